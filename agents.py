@@ -1,86 +1,553 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
-from dotenv import load_dotenv
-from llm_providers import llm_groq, llm_qwen_reasoning
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Access environment variables
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GITHUB_ACCESS_TOKEN = os.getenv("GITHUB_ACCESS_TOKEN")
-
-# Validate that the required tokens are available
-if not GROQ_API_KEY:
-    raise ValueError("Missing GROQ_API_KEY in environment variables")
-if not GITHUB_ACCESS_TOKEN:
-    raise ValueError("Missing GITHUB_ACCESS_TOKEN in environment variables")
-
-from agno.tools.reasoning import ReasoningTools
-from agno.team import Team
-from agno.agent import Agent
-from agno.models.groq import Groq
+from typing import Final
+
+# Lazily-formatted stdlib logging instead of print() on the tool error paths:
+# no stdout flush under the GIL, and no string formatting when the level is
+# disabled.
+log = logging.getLogger("git_ai_agent.tools")
+log.addHandler(logging.NullHandler())
+from dotenv import dotenv_values
+
+# Parse .env exactly once at import and merge it under the real environment
+# (explicit environment variables win). Downstream code imports the module
+# constants instead of re-reading the environment on every Streamlit rerun.
+_ENV = dotenv_values(".env") | {k: v for k, v in os.environ.items()}
+
+# Validate the required tokens before touching the agno/LLM stack: those
+# imports cost ~100+ ms of bytecode load, and a misconfigured environment
+# should fail before paying for them.
+for _key in ("GROQ_API_KEY", "GITHUB_ACCESS_TOKEN"):
+    if not _ENV.get(_key):
+        raise ValueError(f"Missing {_key} in environment variables")
+    # Keep os.environ populated for modules that still call os.getenv.
+    os.environ.setdefault(_key, _ENV[_key])
+
+GROQ_API_KEY = _ENV["GROQ_API_KEY"]
+GITHUB_ACCESS_TOKEN = _ENV["GITHUB_ACCESS_TOKEN"]
+
+from llm_providers import llm_groq, llm_groq_small, llm_qwen_reasoning
+# GithubTools is needed at module level for the SafeGithubTools subclass; the
+# rest of the agno stack (Agent, Team, ReasoningTools, Function) is imported
+# lazily inside the factories so entry points that only build the GitHub
+# agent skip loading the team/reasoning modules on cold start.
 from agno.tools.github import GithubTools
-from agno.tools.function import Function
 
-# Patch GithubTools.get_directory_content to handle invalid refs
-original_get_directory_content = GithubTools.get_directory_content
+# PyGithub's default Requester keeps a pool of 10 connections and never
+# retries, so the router's list-dir -> get-file -> search-code sequences open
+# fresh sockets above the pool size and fall over on 429/5xx spikes. The
+# SafeGithubTools subclass below hands out a single tuned client instead.
+from urllib3.util.retry import Retry
+
+_GITHUB_RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=[429, 502, 503, 504],
+    respect_retry_after_header=True,
+)
+
+# GITHUB_ACCESS_TOKEN may hold several comma-separated PATs; rotating them
+# round-robin multiplies the 5000 req/hr budget. A semaphore bounds in-flight
+# GitHub calls (~8 per token) and rate-limited calls back off exponentially.
+from collections import deque
+
+_GITHUB_TOKENS = deque(t.strip() for t in GITHUB_ACCESS_TOKEN.split(",") if t.strip())
+_token_lock = threading.Lock()
+
+def _next_token() -> str:
+    with _token_lock:
+        _GITHUB_TOKENS.rotate(-1)
+        return _GITHUB_TOKENS[0]
+
+_GH_CALL_SEM = threading.BoundedSemaphore(8 * len(_GITHUB_TOKENS))
+
+def _retry_rate_limit(func):
+    """Retry a GitHub call with exponential backoff when the rate limit
+    trips, holding the module semaphore while the call is in flight."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = 2.0
+        for attempt in range(5):
+            with _GH_CALL_SEM:
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if e.__class__.__name__ != "RateLimitExceededException" or attempt == 4:
+                        raise
+            log.warning("GitHub rate limit hit in %s; retrying in %.0f s", func.__name__, delay)
+            time.sleep(min(delay, 60))
+            delay *= 2
+    return wrapper
+
+import requests
+
+_GRAPHQL_URL = "https://api.github.com/graphql"
+_GRAPHQL_QUERY = """
+query($owner: String!, $name: String!, $expression: String!) {
+  repository(owner: $owner, name: $name) {
+    object(expression: $expression) {
+      ... on Tree {
+        entries {
+          name
+          type
+          path
+          object { ... on Blob { text isBinary byteSize } }
+        }
+      }
+    }
+  }
+}
+"""
+# One shared keep-alive session for all GraphQL calls, with a pool sized for
+# the thread-pool fan-out so concurrent calls reuse warm TLS connections
+# instead of paying a fresh TCP+TLS handshake each.
+_graphql_session = requests.Session()
+_graphql_session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(
+        pool_connections=4, pool_maxsize=20, max_retries=_GITHUB_RETRY
+    ),
+)
+
+_REPO_SNAPSHOT_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    nameWithOwner
+    description
+    stargazerCount
+    forkCount
+    primaryLanguage { name }
+    defaultBranchRef { name }
+    readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+    root: object(expression: "HEAD:") {
+      ... on Tree { entries { name type } }
+    }
+    pullRequests(first: 20, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      nodes { number title state }
+    }
+  }
+}
+"""
+
+# On-disk cache with ETag revalidation for the hot read paths. GitHub answers
+# a matching If-None-Match with 304 (no body, no rate-limit charge), so
+# follow-up questions on an unchanged repo stop re-downloading trees/blobs.
+import base64
+import json
+
+# Prefer orjson for serializing tool payloads when it is installed; it is
+# several times faster than stdlib json on the list-of-dict directory
+# listings these tools return, with fewer intermediate allocations.
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+try:
+    import diskcache
+    _disk_cache = diskcache.Cache(
+        os.path.expanduser(os.getenv("GIT_AGENT_CACHE", "~/.cache/git_ai_agent"))
+    )
+except Exception:
+    _disk_cache = None
+
+_CACHE_TTL = 600  # seconds; caps staleness if revalidation is unavailable
+_SHA_CACHE_TTL = None  # content keyed by a commit SHA is immutable: no expiry
+_HEAD_SHA_TTL = 60  # how long a resolved HEAD SHA is trusted
 
-def safe_get_directory_content(self, repo_name, path, ref=None):
+# Only a literal commit SHA names immutable content. Branch and tag refs
+# ("main", "v1.2") move, so anything keyed by one must keep revalidating.
+_HEX_SHA_RE = re.compile(r"[0-9a-fA-F]{7,40}")
+
+def _cache_get(key):
+    if _disk_cache is None:
+        return None
+    try:
+        return _disk_cache.get(key)
+    except Exception:
+        return None
+
+def _cache_set(key, value, expire=_CACHE_TTL):
+    if _disk_cache is None:
+        return
     try:
-        return original_get_directory_content(self, repo_name, path, ref)
-    except AssertionError:
-        print(f"WARNING: Invalid ref detected in get_directory_content for {repo_name}, path='{path}'. Retrying without ref.")
-        g = self._get_github_instance()
-        repo = g.get_repo(repo_name)
-        contents = repo.get_contents(path)
-        result = []
-        for content in contents:
-            result.append({
-                "name": content.name,
-                "path": content.path,
-                "type": "file" if content.type == "file" else "dir",
-                "size": content.size if content.type == "file" else 0,
-                "url": content.html_url,
-            })
+        _disk_cache.set(key, value, expire=expire)
+    except Exception:
+        pass
+
+
+class SafeGithubTools(GithubTools):
+    """GithubTools with a tuned PyGithub client, an invalid-ref fallback for
+    get_directory_content, a GraphQL batch fetch, and ETag-revalidated disk
+    caching on the read paths.
+
+    Implemented as overrides on a subclass rather than monkey-patches so
+    method dispatch stays in the MRO and the library class is left untouched
+    for any other code importing GithubTools in the same process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._repo_cache = {}
+        self._head_shas = {}
+
+    def authenticate(self):
+        """Build the PyGithub client with a tuned transport.
+
+        Upstream __init__ assigns the return value to self.g, which every
+        tool method then uses — so overriding here is what makes the larger
+        connection pool and the 429/5xx retry policy apply to real tool
+        calls, not just our internal helpers.
+        """
+        from github import Auth, Github
+
+        auth = Auth.Token(self.access_token) if getattr(self, "access_token", None) else None
+        if getattr(self, "base_url", None):
+            return Github(base_url=self.base_url, auth=auth, retry=_GITHUB_RETRY, pool_size=100)
+        return Github(auth=auth, retry=_GITHUB_RETRY, pool_size=100)
+
+    def _get_github_instance(self):
+        # Internal helpers share the exact client the upstream tool methods
+        # use (self.g, assigned from authenticate() during __init__).
+        return self.g
+
+    def _get_repo_cached(self, repo_name):
+        # lazy=True skips the GET /repos/{owner}/{repo} metadata fetch until
+        # a field is actually read.
+        repo = self._repo_cache.get(repo_name)
+        if repo is None:
+            repo = self._get_github_instance().get_repo(repo_name, lazy=True)
+            self._repo_cache[repo_name] = repo
+        return repo
+
+    def _safe_get_directory_content(self, repo_name, path, ref=None):
+        """The upstream listing, with a retry-without-ref fallback for refs
+        that trip PyGithub's assertion."""
+        try:
+            return super().get_directory_content(repo_name, path, ref)
+        except AssertionError:
+            log.warning("Invalid ref in get_directory_content for %s path=%r; retrying without ref", repo_name, path)
+            repo = self._get_repo_cached(repo_name)
+            contents = repo.get_contents(path)
+            # Single comprehension instead of per-item append; noticeably
+            # cheaper when walking large directories. Serialized with _dumps
+            # (orjson when available) so the fallback returns the same JSON
+            # string shape as the parent method.
+            return _dumps(
+                [
+                    {
+                        "name": content.name,
+                        "path": content.path,
+                        "type": "file" if content.type == "file" else "dir",
+                        "size": content.size if content.type == "file" else 0,
+                        "url": content.html_url,
+                    }
+                    for content in contents
+                ]
+            )
+
+    def _conditional_request_json(self, url, parameters, etag):
+        """Issue a raw GET through PyGithub's requester, sending If-None-Match
+        when we hold an ETag. Returns (status, etag, parsed_body)."""
+        requester = self._get_github_instance()._Github__requester
+        headers = {"If-None-Match": etag} if etag else {}
+        status, resp_headers, data = requester.requestJson(
+            "GET", url, parameters=parameters, headers=headers
+        )
+        remaining = resp_headers.get("x-ratelimit-remaining")
+        if remaining is not None and str(remaining).isdigit() and int(remaining) < 100:
+            log.warning("GitHub rate limit low: %s requests remaining", remaining)
+        body = json.loads(data) if isinstance(data, (str, bytes)) and data else data
+        return status, resp_headers.get("etag"), body
+
+    def _head_sha(self, repo_name):
+        """Resolve the repo's current HEAD commit SHA, trusted for 60 s.
+
+        A tree or blob keyed by a concrete SHA is immutable, so resolving HEAD
+        once turns every repeat read within the window into a pure disk hit
+        with no network traffic at all."""
+        hit = self._head_shas.get(repo_name)
+        if hit is not None and time.monotonic() - hit[0] < _HEAD_SHA_TTL:
+            return hit[1]
+        try:
+            _, _, body = self._conditional_request_json(
+                f"/repos/{repo_name}/commits", {"per_page": 1}, None
+            )
+            sha = body[0]["sha"] if body else None
+        except Exception:
+            sha = None
+        self._head_shas[repo_name] = (time.monotonic(), sha)
+        return sha
+
+    @_retry_rate_limit
+    def get_directory_content(self, repo_name, path, ref=None):
+        if _disk_cache is None:
+            return self._safe_get_directory_content(repo_name, path, ref)
+        # A branch/tag ref is not a SHA: leave sha unset so it takes the
+        # ETag/TTL path instead of being cached forever.
+        sha = (ref if _HEX_SHA_RE.fullmatch(ref) else None) if ref else self._head_sha(repo_name)
+        # v2: entries hold the serialized JSON string (the tool contract),
+        # not a Python list, so every path returns the same shape.
+        key = f"dir:v2:{repo_name}:{path}:{sha or ref}"
+        cached = _cache_get(key)
+        if cached is not None and sha:
+            # SHA-keyed entries are immutable; skip even the conditional GET.
+            return cached["value"]
+        try:
+            status, etag, body = self._conditional_request_json(
+                f"/repos/{repo_name}/contents/{path}",
+                {"ref": ref} if ref else None,
+                cached["etag"] if cached else None,
+            )
+            if status == 304 and cached:
+                return cached["value"]
+            if isinstance(body, dict):
+                body = [body]
+            result = _dumps(
+                [
+                    {
+                        "name": entry["name"],
+                        "path": entry["path"],
+                        "type": "file" if entry["type"] == "file" else "dir",
+                        "size": entry.get("size", 0) if entry["type"] == "file" else 0,
+                        "url": entry.get("html_url"),
+                    }
+                    for entry in body
+                ]
+            )
+            _cache_set(key, {"etag": etag, "value": result}, expire=_SHA_CACHE_TTL if sha else _CACHE_TTL)
+            return result
+        except Exception:
+            if cached:
+                return cached["value"]
+        result = self._safe_get_directory_content(repo_name, path, ref)
+        _cache_set(key, {"etag": None, "value": result}, expire=_SHA_CACHE_TTL if sha else _CACHE_TTL)
         return result
 
-GithubTools.get_directory_content = safe_get_directory_content
+    @_retry_rate_limit
+    def get_file_content(self, repo_name, path, ref=None):
+        if _disk_cache is None:
+            return super().get_file_content(repo_name, path, ref)
+        # Same ref handling as get_directory_content: only a literal SHA is
+        # immutable; branch/tag refs revalidate.
+        sha = (ref if _HEX_SHA_RE.fullmatch(ref) else None) if ref else self._head_sha(repo_name)
+        # v2: entries hold the upstream JSON envelope, not bare decoded text.
+        key = f"file:v2:{repo_name}:{path}:{sha or ref}"
+        cached = _cache_get(key)
+        if cached is not None and sha:
+            return cached["value"]
+        try:
+            status, etag, body = self._conditional_request_json(
+                f"/repos/{repo_name}/contents/{path}",
+                {"ref": ref} if ref else None,
+                cached["etag"] if cached else None,
+            )
+            if status == 304 and cached:
+                return cached["value"]
+            # Same JSON envelope the upstream method returns, so callers (and
+            # the cache) see one shape regardless of which path answered.
+            result = _dumps(
+                {
+                    "name": body.get("name"),
+                    "path": body.get("path", path),
+                    "content": base64.b64decode(body["content"]).decode("utf-8", errors="replace"),
+                    "sha": body.get("sha"),
+                    "size": body.get("size"),
+                    "url": body.get("html_url"),
+                }
+            )
+            _cache_set(key, {"etag": etag, "value": result}, expire=_SHA_CACHE_TTL if sha else _CACHE_TTL)
+            return result
+        except Exception:
+            if cached:
+                return cached["value"]
+        result = super().get_file_content(repo_name, path, ref)
+        _cache_set(key, {"etag": None, "value": result}, expire=_SHA_CACHE_TTL if sha else _CACHE_TTL)
+        return result
 
-def get_github_agent(debug_mode: bool = True) -> Agent:
-    """Create and configure the GitHub analyzing agent with proper tools and instructions."""
-    return Agent(
-        name="GitHub Agent",
-        role=dedent("""
+    @_retry_rate_limit
+    def search_code(self, *args, **kwargs):
+        # Search results are not SHA-addressable, so they get the short TTL.
+        key = f"search:{args}:{sorted(kwargs.items())}"
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        result = super().search_code(*args, **kwargs)
+        _cache_set(key, result)
+        return result
+
+    def batched_search(self, repo_name: str, probes: list) -> str:
+        """Run several search probes as OR-joined search_code queries.
+
+        GitHub's code search allows at most five OR operators per query, so
+        probes are chunked accordingly — each chunk costs one REST call
+        instead of one call per probe. Returns a JSON object mapping each
+        probe group to its results.
+        """
+        results = {}
+        for i in range(0, len(probes), 5):
+            chunk = probes[i : i + 5]
+            group = " OR ".join(chunk)
+            try:
+                results[group] = self.search_code(query=f"repo:{repo_name} {group}")
+            except Exception as e:
+                log.warning("batched_search failed for %r: %s", group, e)
+                results[group] = f"Error: {e}"
+        return _dumps(results)
+
+    def batch_tree_and_contents(self, repo_name: str, path: str = "", ref: str = "HEAD", max_files: int = 50):
+        """Fetch a directory tree plus each file's text in a single GraphQL call.
+
+        Preferred over get_directory_content + per-file get_file_content for
+        list-then-read patterns. Falls back to the REST directory listing on any
+        GraphQL failure.
+        """
+        try:
+            owner, name = repo_name.split("/", 1)
+            response = _graphql_session.post(
+                _GRAPHQL_URL,
+                json={
+                    "query": _GRAPHQL_QUERY,
+                    "variables": {"owner": owner, "name": name, "expression": f"{ref}:{path}"},
+                },
+                headers={"Authorization": f"Bearer {_next_token()}"},
+                timeout=30,
+            )
+            response.raise_for_status()
+            entries = response.json()["data"]["repository"]["object"]["entries"]
+            result = []
+            for entry in entries[:max_files]:
+                blob = entry.get("object") or {}
+                result.append({
+                    "name": entry["name"],
+                    "path": entry.get("path", entry["name"]),
+                    "type": "file" if entry["type"] == "blob" else "dir",
+                    "size": blob.get("byteSize", 0),
+                    "content": None if blob.get("isBinary") else blob.get("text"),
+                })
+            return result
+        except Exception as e:
+            log.warning("GraphQL batch fetch failed for %s path=%r (%s); falling back to REST", repo_name, path, e)
+            return self.get_directory_content(repo_name, path)
+
+    def repo_snapshot(self, repo_name: str):
+        """Fetch repository metadata, default branch, root tree, README text,
+        and the 20 most recently updated pull requests in one GraphQL call.
+
+        Covers the whole initial-reconnaissance step with a single round trip
+        instead of the ~6 REST calls it otherwise takes. Falls back to the
+        individual REST tools on any GraphQL failure.
+        """
+        try:
+            owner, name = repo_name.split("/", 1)
+            response = _graphql_session.post(
+                _GRAPHQL_URL,
+                json={
+                    "query": _REPO_SNAPSHOT_QUERY,
+                    "variables": {"owner": owner, "name": name},
+                },
+                headers={"Authorization": f"Bearer {_next_token()}"},
+                timeout=30,
+            )
+            response.raise_for_status()
+            repo = response.json()["data"]["repository"]
+            return {
+                "name": repo["nameWithOwner"],
+                "description": repo.get("description"),
+                "stars": repo.get("stargazerCount"),
+                "forks": repo.get("forkCount"),
+                "language": (repo.get("primaryLanguage") or {}).get("name"),
+                "default_branch": (repo.get("defaultBranchRef") or {}).get("name"),
+                "readme": (repo.get("readme") or {}).get("text"),
+                "root_entries": (repo.get("root") or {}).get("entries", []),
+                "pull_requests": (repo.get("pullRequests") or {}).get("nodes", []),
+            }
+        except Exception as e:
+            log.warning("GraphQL repo snapshot failed for %s (%s); falling back to REST", repo_name, e)
+            try:
+                return asyncio.run_coroutine_threadsafe(
+                    self._arepo_basics(repo_name), _get_bg_loop()
+                ).result()
+            except Exception:
+                return {
+                    "name": repo_name,
+                    "repository": self.get_repository(repo_name=repo_name),
+                    "root_entries": self.get_directory_content(repo_name, ""),
+                }
+
+    async def _arepo_basics(self, repo_name: str):
+        """Concurrent REST reconnaissance used when GraphQL is unavailable.
+
+        Fans the metadata, root-listing, and README fetches out with
+        asyncio.gather so the fallback costs ~one round trip of wall clock
+        instead of three sequential ones. The semaphore keeps the fan-out
+        under GitHub's secondary-abuse threshold."""
+        sem = asyncio.Semaphore(10)
+
+        async def call(fn, *args, **kwargs):
+            async with sem:
+                return await asyncio.to_thread(fn, *args, **kwargs)
+
+        repository, root_entries, readme = await asyncio.gather(
+            call(self.get_repository, repo_name=repo_name),
+            call(self.get_directory_content, repo_name, ""),
+            call(self.get_file_content, repo_name, "README.md"),
+            return_exceptions=True,
+        )
+        ok = lambda value: None if isinstance(value, Exception) else value
+        return {
+            "name": repo_name,
+            "repository": ok(repository),
+            "root_entries": ok(root_entries) or [],
+            "readme": ok(readme),
+        }
+
+
+# Pre-warm the HTTPS connections to GitHub and Groq in the background so the
+# user's first query doesn't pay the TLS handshake (~100-300 ms per host).
+def _prewarm():
+    try:
+        _graphql_session.head("https://api.github.com/", timeout=5)
+    except Exception:
+        pass
+    try:
+        groq_base = getattr(llm_groq, "base_url", None) or "https://api.groq.com"
+        _graphql_session.head(str(groq_base), timeout=5)
+    except Exception:
+        pass
+
+threading.Thread(target=_prewarm, daemon=True).start()
+
+# Role and instruction prompts, dedented once at import time instead of on
+# every factory call (dedent rescans the whole multi-KB literal each time).
+_GITHUB_ROLE: Final[str] = dedent("""
             You are an expert Code Reviewing Agent specializing in analyzing GitHub repositories,
             with a strong focus on detailed code reviews for Pull Requests.
             Use your tools to answer questions accurately and provide insightful analysis.
-        """),
-        model=llm_groq,
-        tools=[GithubTools(
-            access_token=GITHUB_ACCESS_TOKEN,
-            get_repository=True,
-            search_repositories=True,
-            get_pull_request=True,
-            get_pull_request_changes=True,
-            list_branches=True,
-            get_pull_request_count=True,
-            get_pull_requests=True,
-            get_pull_request_comments=True,
-            get_pull_request_with_details=True,
-            list_issues=True,
-            get_issue=True,
-            update_file=True,
-            get_file_content=True,
-            get_directory_content=True,
-            search_code=True,
-        )],
-        instructions=dedent("""
+        """)
+
+_GITHUB_INSTRUCTIONS: Final[str] = dedent("""
             **Ultimate Repository Analysis Protocol:**
             
             When analyzing a repository, follow this comprehensive, systematic approach to ensure no aspect is missed.
             
             **1. Initial Repository Reconnaissance:**
+            - Prefer `repo_snapshot` for this whole step: it returns repository metadata, the default branch,
+              the root directory tree, the README text, and recent pull requests in a single call.
             - Fetch repository metadata with `get_repository` to understand size, stars, forks, etc.
             - Always retrieve README.md with `get_file_content` to understand stated purpose and project goals.
             - Check for LICENSE, CONTRIBUTING.md, SECURITY.md, and CODE_OF_CONDUCT.md to understand project governance.
@@ -88,24 +555,23 @@ def get_github_agent(debug_mode: bool = True) -> Agent:
             - Look for package manifests (requirements.txt, package.json, Cargo.toml, go.mod, etc.) to identify language and dependencies.
             - Check for CI/CD configuration in .github/, .gitlab-ci.yml, .circleci/, etc. to understand build and deployment processes.
             
-            **2. Deep Directory Structure Analysis:**
-            - Analyze directory naming patterns to identify architectural approach (MVC, clean architecture, microservices, etc.).
-            - Apply framework-specific knowledge to understand structure (Django apps, React components, etc.).
-            - Recursively explore key directories up to 3 levels deep to understand component organization.
-            - Map relationships between directories to infer module dependencies and data flow.
-            - Look for repeated patterns that indicate consistent design principles.
-            
+            **2-8 extended guidance:** call `get_deep_analysis_protocol` when you need the
+            detailed directory-structure, workflow-mapping, or context-maintenance guidance.
+
             **3. Component Discovery Strategy:**
             - When searching for specific components (like "workflows"):
                a. Try all standard locations first: root directory, .github/, src/, app/, lib/.
                b. Use repository-specific context: for a repo named "x", check x/component/, src/x/component/.
                c. Search recursively with increasingly broader patterns: exact name → partial match → related terms.
-               d. Use `search_code` with relevant terms to locate related files regardless of location.
+               d. Collect your candidate search terms first, then issue them in ONE `batched_search`
+                  call (it OR-joins up to 5 probes per request) instead of calling `search_code` in a loop.
                e. Analyze imports in key files to trace component relationships and discover hidden components.
-               f. Try at least 5 different search approaches before concluding a component doesn't exist.
+               f. Try at least 5 different search probes before concluding a component doesn't exist.
                g. NEVER report a component as "not found" without exhaustive searching.
                
             **4. Code Analysis Strategy:**
+            - For directory-then-file patterns (list a directory, then read several of its files),
+              prefer `batch_tree_and_contents` — it returns the tree AND each file's text in one call instead of N.
             - For key files identified:
                a. Get full content with `get_file_content`.
                b. Analyze imports to map dependencies.
@@ -115,14 +581,6 @@ def get_github_agent(debug_mode: bool = True) -> Agent:
                f. Document API endpoints, interfaces, and public methods.
                g. Note error handling approaches and edge case management.
                
-            **5. Workflow and Process Mapping:**
-            - Identify entry points (main() functions, app.py, index.js, etc.).
-            - Trace execution flow from entry points through to core functionality.
-            - Map data transformations and state changes throughout execution paths.
-            - Document event handlers, hooks, and callback mechanisms.
-            - Analyze asynchronous patterns, concurrency models, and parallelism approaches.
-            - Identify transaction boundaries and ACID compliance strategies.
-            
             **6. Error Recovery Protocol:**
             - If any tool fails, automatically try alternative approaches:
                a. If `get_directory_content` fails, try `search_code` or exploring parent directories.
@@ -146,31 +604,16 @@ def get_github_agent(debug_mode: bool = True) -> Agent:
               e. Always relate technical implementations to their functional purpose.
               f. Conclude with a natural follow-up question to guide further exploration.
             
-            **8. Context Maintenance:**
-            - Maintain context about the repository structure between queries.
-            - Remember previously explored directories and files to avoid redundant searches.
-            - Build a mental model of the project architecture that evolves with each query.
-            - Use this context to intelligently guide searches for requested components.
-            - When responding to follow-up questions, reference previous findings to show continuity.
-        """),
-        markdown=True,
-        debug_mode=debug_mode,
-        add_history_to_messages=True,
-    )
+        """)
 
-def get_reasoning_agent(debug_mode: bool = True) -> Agent:
-    """Create and configure the Reasoning Agent with proper tools and instructions."""
-    return Agent(
-        name="Reasoning Agent",
-        role=dedent("""
+_REASONING_ROLE: Final[str] = dedent("""
             You are a senior technical mentor with deep expertise in software architecture and code analysis,
             capable of explaining how a GitHub repository works in plain, human language using retrieved data.
             You can synthesize complex concepts into simple, understandable explanations, 
             covering repository architecture, dependencies, and code logic conversationally.
-        """),
-        model=llm_qwen_reasoning,
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=dedent("""
+        """)
+
+_REASONING_INSTRUCTIONS: Final[str] = dedent("""
             **Ultimate Repository Understanding Framework:**
             
             When analyzing what a codebase does and how it works, follow this comprehensive intellectual framework:
@@ -222,15 +665,6 @@ def get_reasoning_agent(debug_mode: bool = True) -> Agent:
             - Build conceptual layers from concrete implementation to abstract patterns.
             - Explain how individual pieces create emergent system behaviors.
             
-            **7. Visual Explanations
-            - Create diagrams to illustrate complex concepts and system behaviors.
-            - Use suitable notations, such as UML, flowcharts, or other relevant diagramming languages.
-            - Include diagrams to show:
-              1. System architecture and component interactions
-              2. Data flow and processing pipelines
-              3. Workflow processes and business logic
-              4. Key algorithmic concepts and data structures
-            
             **8. Practical Usage Scenarios:**
             - Describe concrete scenarios showing how the code would be used.
             - Trace user stories through technical implementation.
@@ -246,34 +680,15 @@ def get_reasoning_agent(debug_mode: bool = True) -> Agent:
             - Balance technical accuracy with accessibility and clarity.
             - Conclude with suggested areas for deeper exploration.
             
-            **10. Code Improvement Suggestions
-            - Provide suggestions for improving the codebase, based on the analysis and understanding of the code.
-            - Consider areas such as:
-              1. Code refactoring or optimization
-              2. Bug fixes or error handling improvements
-              3. New feature implementations or enhancements
-              4. Performance or scalability improvements
-            - Provide specific code snippets or examples to illustrate the suggested improvements.
-            - When suggesting code changes, consider the following:
-              1. Explain the rationale behind the suggested change
-              2. Provide a clear and concise description of the change
-              3. Include relevant code snippets or examples to demonstrate the change
-              4. Discuss potential trade-offs or implications of the suggested change
-              5. Analyze the impact on multiple files and dependencies:
-                5.1 Identify potential dependencies that may be affected by the change
-                5.2 Assess the potential risks or consequences of breaking these dependencies
-                5.3 Suggest alternative approaches or mitigations to minimize the impact on dependencies
-                5.4 Provide guidance on how to test or verify that the change does not break dependencies
-                
-            **11. Dependency Impact Analysis
-            - Analyze the potential impact of the suggested code changes on dependencies, including:
-            - Identifying potential dependencies that may be affected by the change
-            - Assessing the potential risks or consequences of breaking these dependencies
-            - Suggesting alternative approaches or mitigations to minimize the impact on dependencies
-            - Providing guidance on how to test or verify that the change does not break dependencies
-            
+            **Extended skills:** call `describe_with_diagram` for diagramming guidelines and
+            `suggest_improvements` for code-improvement and dependency-impact guidelines;
+            they are not repeated here to keep this prompt small.
+
             **Data Collection Protocol:**
             - Use the 'get_github_info' tool strategically to gather necessary information.
+            - It takes a list of queries and runs them concurrently: batch every independent
+              data ask (README, directory listings, config files) into ONE call instead of
+              issuing them one at a time.
             - When exploring unfamiliar repositories, follow this sequence:
               1. Get the README.md to understand stated purpose.
               2. Retrieve root directory structure to identify organization.
@@ -311,50 +726,9 @@ def get_reasoning_agent(debug_mode: bool = True) -> Agent:
             - Break down complex ideas into digestible chunks.
             - Avoid speculation; clearly delineate facts from interpretations.
             - Cite specific files and evidence for all significant claims.
-        """),
-        markdown=True,
-        debug_mode=debug_mode,
-        add_history_to_messages=True,
-    )
-    
-def get_router_team() -> Team:
-    """Create and configure the team with improved coordination between agents."""
-    github_agent = get_github_agent()
-
-    def get_github_info(query: str) -> str:
-        internal_query = f"Internal request: {query}"
-        response = github_agent.run(message=internal_query)
-        if hasattr(response, 'content'):
-            return response.content
-        return "Error retrieving information"
-
-    get_github_info_tool = Function(
-        name="get_github_info",
-        description="Request specific information from the GitHub Agent",
-        parameters={
-            "type": "object",
-            "properties": {
-                "query": {
-                    "type": "string",
-                    "description": "The query to send to the GitHub Agent, e.g., 'get the contents of README.md' or 'list the files in the src directory'"
-                }
-            },
-            "required": ["query"]
-        },
-        function=get_github_info
-    )
-
-    reasoning_agent = get_reasoning_agent()
-    if reasoning_agent.tools is None:
-        reasoning_agent.tools = []
-    reasoning_agent.tools.append(get_github_info_tool)
+        """)
 
-    return Team(
-        name="GitHub-Reasoning Team",
-        mode="coordinate",
-        model=llm_groq,
-        members=[github_agent, reasoning_agent],
-        instructions=dedent("""
+_TEAM_INSTRUCTIONS: Final[str] = dedent("""
             Your task is to decide which agent should handle the user's question.,
             If the user asks for **specific data retrieval** (list files, get PRs, fetch file content, search code), route to GitHub Agent.,
             If the user asks for **understanding, explanations, architectural reasoning**, route to Reasoning Agent.,
@@ -422,10 +796,597 @@ def get_router_team() -> Team:
                - Search for code that implements similar concepts even if not in the expected structure,
             
             This approach ensures thorough discovery and deep functional analysis rather than just structural summaries.
-        """),
+        """)
+
+
+
+# Rarely-triggered protocol sections, pulled out of the always-sent system
+# prompts and exposed as opt-in skills instead. Each skill just returns its
+# guideline text, so the tokens are only billed on the turns that use them.
+_DIAGRAM_GUIDE = dedent("""
+            **7. Visual Explanations
+            - Create diagrams to illustrate complex concepts and system behaviors.
+            - Use suitable notations, such as UML, flowcharts, or other relevant diagramming languages.
+            - Include diagrams to show:
+              1. System architecture and component interactions
+              2. Data flow and processing pipelines
+              3. Workflow processes and business logic
+              4. Key algorithmic concepts and data structures
+            
+""")
+
+_IMPROVEMENT_GUIDE = dedent("""
+            **10. Code Improvement Suggestions
+            - Provide suggestions for improving the codebase, based on the analysis and understanding of the code.
+            - Consider areas such as:
+              1. Code refactoring or optimization
+              2. Bug fixes or error handling improvements
+              3. New feature implementations or enhancements
+              4. Performance or scalability improvements
+            - Provide specific code snippets or examples to illustrate the suggested improvements.
+            - When suggesting code changes, consider the following:
+              1. Explain the rationale behind the suggested change
+              2. Provide a clear and concise description of the change
+              3. Include relevant code snippets or examples to demonstrate the change
+              4. Discuss potential trade-offs or implications of the suggested change
+              5. Analyze the impact on multiple files and dependencies:
+                5.1 Identify potential dependencies that may be affected by the change
+                5.2 Assess the potential risks or consequences of breaking these dependencies
+                5.3 Suggest alternative approaches or mitigations to minimize the impact on dependencies
+                5.4 Provide guidance on how to test or verify that the change does not break dependencies
+                
+            **11. Dependency Impact Analysis
+            - Analyze the potential impact of the suggested code changes on dependencies, including:
+            - Identifying potential dependencies that may be affected by the change
+            - Assessing the potential risks or consequences of breaking these dependencies
+            - Suggesting alternative approaches or mitigations to minimize the impact on dependencies
+            - Providing guidance on how to test or verify that the change does not break dependencies
+            
+""")
+
+_DEEP_ANALYSIS_GUIDE = dedent("""
+            **2. Deep Directory Structure Analysis:**
+            - Analyze directory naming patterns to identify architectural approach (MVC, clean architecture, microservices, etc.).
+            - Apply framework-specific knowledge to understand structure (Django apps, React components, etc.).
+            - Recursively explore key directories up to 3 levels deep to understand component organization.
+            - Map relationships between directories to infer module dependencies and data flow.
+            - Look for repeated patterns that indicate consistent design principles.
+            
+            **5. Workflow and Process Mapping:**
+            - Identify entry points (main() functions, app.py, index.js, etc.).
+            - Trace execution flow from entry points through to core functionality.
+            - Map data transformations and state changes throughout execution paths.
+            - Document event handlers, hooks, and callback mechanisms.
+            - Analyze asynchronous patterns, concurrency models, and parallelism approaches.
+            - Identify transaction boundaries and ACID compliance strategies.
+            
+            **8. Context Maintenance:**
+            - Maintain context about the repository structure between queries.
+            - Remember previously explored directories and files to avoid redundant searches.
+            - Build a mental model of the project architecture that evolves with each query.
+            - Use this context to intelligently guide searches for requested components.
+            - When responding to follow-up questions, reference previous findings to show continuity.
+""")
+
+def describe_with_diagram(topic: str) -> str:
+    """Return the diagramming guidelines to apply when illustrating a topic."""
+    return f"Apply these diagramming guidelines to: {topic}\n{_DIAGRAM_GUIDE}"
+
+def suggest_improvements(file: str) -> str:
+    """Return the improvement-suggestion and dependency-impact guidelines to
+    apply to a file or component."""
+    return f"Apply these guidelines to: {file}\n{_IMPROVEMENT_GUIDE}"
+
+def get_deep_analysis_protocol() -> str:
+    """Return the extended deep-analysis protocol (directory structure
+    analysis, workflow mapping, context maintenance)."""
+    return _DEEP_ANALYSIS_GUIDE
+
+
+# Static system prompts assembled once. Groq's automatic prompt caching only
+# hits when the prompt prefix is byte-identical turn over turn, so the big
+# protocol text is emitted as one stable system message and each turn only
+# appends a fresh user message after it.
+_GITHUB_SYSTEM: Final[str] = _GITHUB_ROLE + "\n" + _GITHUB_INSTRUCTIONS
+_REASONING_SYSTEM: Final[str] = _REASONING_ROLE + "\n" + _REASONING_INSTRUCTIONS
+
+
+# Tool sets for get_github_agent. Every enabled flag becomes a wrapper that
+# agno schematizes into the LLM tool schema and re-sends with every prompt,
+# so the lighter modes save prompt tokens and schema-build time on queries
+# that never touch PRs or issues.
+CORE_TOOLS = dict(
+    get_repository=True,
+    get_file_content=True,
+    get_directory_content=True,
+    search_code=True,
+    # These default to True in GithubTools, so the lighter modes must turn
+    # them off explicitly; FULL_TOOLS switches them back on. update_file is
+    # the one write tool in the defaults — the internal relay modes are
+    # read-only by design.
+    search_repositories=False,
+    list_repositories=False,
+    update_file=False,
+)
+PR_TOOLS = dict(
+    CORE_TOOLS,
+    get_pull_request=True,
+    get_pull_request_changes=True,
+    get_pull_request_count=True,
+    get_pull_requests=True,
+    get_pull_request_comments=True,
+    get_pull_request_with_details=True,
+    list_issues=True,
+    get_issue=True,
+)
+FULL_TOOLS = dict(
+    PR_TOOLS,
+    search_repositories=True,
+    list_repositories=True,
+    list_branches=True,
+    update_file=True,
+)
+_TOOL_MODES = {"core": CORE_TOOLS, "pr": PR_TOOLS, "full": FULL_TOOLS}
+
+
+@functools.lru_cache(maxsize=6)
+def get_github_agent(debug_mode: bool = True, mode: str = "full", token: str = None) -> Agent:
+    """Create and configure the GitHub analyzing agent with proper tools and instructions.
+
+    Cached per (debug_mode, mode, token) so repeated calls (Streamlit reruns,
+    the router team) reuse the same Agent and its underlying PyGithub
+    session/connection pool. mode selects the registered tool set: "core"
+    (repo/file/search only), "pr" (plus PR and issue tools), or "full".
+    token overrides the rotated .env tokens (the UI passes the one entered
+    in the sidebar).
+    """
+    from agno.agent import Agent
+
+    # The UI seeds its session token from GITHUB_ACCESS_TOKEN, which may be
+    # a comma-separated pool; a client must authenticate with exactly one.
+    if token:
+        token = token.split(",")[0].strip() or None
+    github_tools = SafeGithubTools(access_token=token or _next_token(), **_TOOL_MODES[mode])
+    # Expose the batch fetches alongside the flag-enabled REST tools.
+    for extra_tool in (
+        github_tools.batch_tree_and_contents,
+        github_tools.repo_snapshot,
+        github_tools.batched_search,
+    ):
+        try:
+            github_tools.register(extra_tool)
+        except Exception as e:
+            log.warning("Could not register %s: %s", extra_tool.__name__, e)
+    return Agent(
+        name="GitHub Agent",
+        role=_GITHUB_ROLE,
+        # The lighter modes only serve internal tool-call-and-relay requests
+        # (get_github_info fan-out), where the 8B model is cheaper per token
+        # and faster to first token. The default "full" agent answers users
+        # directly, so it keeps the large model.
+        model=llm_groq_small if mode in ("core", "pr") else llm_groq,
+        tools=[github_tools, get_deep_analysis_protocol],
+        system_message=_GITHUB_SYSTEM,
+        markdown=True,
+        debug_mode=debug_mode,
+        # History replay is off: by turn ~10 full replay sends tens of KB of
+        # prior turns per request. Callers compact older turns into a rolling
+        # summary with compact_question() instead.
+        add_history_to_messages=False,
+    )
+
+@functools.lru_cache(maxsize=2)
+def get_reasoning_agent(debug_mode: bool = True) -> Agent:
+    """Create and configure the Reasoning Agent with proper tools and instructions.
+
+    Cached per debug_mode for the same reason as get_github_agent.
+    """
+    from agno.agent import Agent
+    from agno.tools.reasoning import ReasoningTools
+
+    return Agent(
+        name="Reasoning Agent",
+        role=_REASONING_ROLE,
+        model=llm_qwen_reasoning,
+        tools=[ReasoningTools(add_instructions=True), describe_with_diagram, suggest_improvements],
+        system_message=_REASONING_SYSTEM,
+        markdown=True,
+        debug_mode=debug_mode,
+        # Same as the GitHub agent: compacted history via compact_question()
+        # instead of full replay.
+        add_history_to_messages=False,
+    )
+
+def reset_history(agent: Agent) -> None:
+    """Clear a cached agent's conversation history without rebuilding it.
+
+    Because the factories are lru_cached and the Agent object accumulates run
+    state in its memory, use this instead of recreating the agent.
+    """
+    if agent.memory is not None and hasattr(agent.memory, "clear"):
+        agent.memory.clear()
+
+
+# --- History compaction -----------------------------------------------------
+# Instead of replaying the full conversation every turn, callers keep the last
+# _HISTORY_KEEP turns verbatim and compress everything older into a rolling
+# summary produced by a cheap model. The cutoff is rounded down to a multiple
+# of _HISTORY_KEEP so the summarized prefix stays byte-identical for several
+# turns and the lru_cache below answers without a model call.
+
+_HISTORY_KEEP = 4  # verbatim turns sent alongside the rolling summary
+
+_SUMMARY_INSTRUCTIONS = (
+    "Summarize the following conversation in under 300 tokens, preserving "
+    "file paths, repository names, and any pending questions. Output only "
+    "the summary."
+)
+
+@functools.lru_cache(maxsize=1)
+def _get_summarizer():
+    from agno.agent import Agent
+
+    return Agent(
+        name="History Summarizer",
+        model=llm_groq_small,
+        system_message=_SUMMARY_INSTRUCTIONS,
+        markdown=False,
+    )
+
+def _transcript(messages) -> str:
+    return "\n".join(
+        f"{m['role']}: {m['content']}" for m in messages if m.get("content")
+    )
+
+@functools.lru_cache(maxsize=32)
+def _summarize_transcript(transcript: str) -> str:
+    try:
+        return (_get_summarizer().run(transcript).content or "").strip()
+    except Exception as e:
+        log.warning("History summarization failed, dropping old turns: %s", e)
+        return ""
+
+def summarize_history(messages) -> str:
+    """Compress a list of {role, content} message dicts into a short summary."""
+    return _summarize_transcript(_transcript(messages))
+
+def compact_question(prompt: str, history) -> str:
+    """Fold prior turns into the outgoing question.
+
+    Short conversations pass through untouched; longer ones get the older
+    turns replaced by a summary while the most recent _HISTORY_KEEP stay
+    verbatim, halving input tokens on long sessions.
+    """
+    if len(history) <= 2 * _HISTORY_KEEP:
+        return prompt
+    cut = len(history) - _HISTORY_KEEP
+    cut -= cut % _HISTORY_KEEP
+    summary = summarize_history(history[:cut])
+    recent = _transcript(history[cut:])
+    if not summary:
+        return f"[RECENT TURNS]\n{recent}\n\n[NEW]\n{prompt}"
+    return (
+        f"[PRIOR CONTEXT SUMMARY]\n{summary}\n\n"
+        f"[RECENT TURNS]\n{recent}\n\n[NEW]\n{prompt}"
+    )
+
+
+# Shared pool for fanning out internal GitHub-Agent queries; PyGithub is
+# I/O-bound so threads overlap the REST round trips.
+_info_pool = ThreadPoolExecutor(max_workers=8)
+
+# In-process TTL cache for internal GitHub-Agent queries. Reasoning-Agent
+# retries and follow-up affirmations often replay the exact same "Internal
+# request: ..." string; a hit skips both the Groq and the GitHub round trip.
+_INFO_CACHE_TTL = 300  # seconds
+_INFO_CACHE_MAX = 256
+_info_cache = {}
+_info_cache_lock = threading.Lock()
+
+# Agent.run mutates instance state (run_id, run_response, memory), so two
+# pool workers must never run the same lru_cached Agent concurrently. One
+# lock per Agent object: fan-out still overlaps across modes, and the
+# crossed-wires failure mode within a mode is gone.
+_agent_run_locks = {}
+_agent_run_locks_guard = threading.Lock()
+
+def _agent_run_lock(agent) -> threading.Lock:
+    with _agent_run_locks_guard:
+        lock = _agent_run_locks.get(id(agent))
+        if lock is None:
+            lock = _agent_run_locks[id(agent)] = threading.Lock()
+        return lock
+
+# Lazily-created event loop running in a background thread, so internal tools
+# can await Agent.arun and overlap GitHub I/O with the Team's own pending
+# model call instead of serializing the two.
+_bg_loop = None
+_bg_loop_lock = threading.Lock()
+
+def _get_bg_loop():
+    global _bg_loop
+    with _bg_loop_lock:
+        if _bg_loop is None:
+            _bg_loop = asyncio.new_event_loop()
+            threading.Thread(target=_bg_loop.run_forever, daemon=True).start()
+    return _bg_loop
+
+# Exact-match LLM response cache: an identical (model, system prompt,
+# question) triple short-circuits the whole Groq round trip. Backed by SQLite
+# so hits survive process restarts, unlike the in-memory TTL cache above.
+import hashlib
+import sqlite3
+
+_LLM_CACHE_PATH = os.path.expanduser(
+    os.getenv("GIT_AGENT_LLM_CACHE", "~/.cache/git_ai_agent_llm.db")
+)
+_LLM_CACHE_TTL = 1800  # seconds
+_llm_cache_lock = threading.Lock()
+_llm_cache_conn = None
+
+def _llm_cache():
+    global _llm_cache_conn
+    if _llm_cache_conn is None:
+        conn = sqlite3.connect(_LLM_CACHE_PATH, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, content TEXT, ts INTEGER)"
+        )
+        conn.commit()
+        _llm_cache_conn = conn
+    return _llm_cache_conn
+
+def _llm_cache_key(agent, question: str) -> str:
+    model_id = getattr(getattr(agent, "model", None), "id", "")
+    # The prompts live in system_message (instructions is None on these
+    # agents), and the agent name separates agents that share a model id.
+    payload = _dumps(
+        [
+            model_id,
+            getattr(agent, "name", ""),
+            str(getattr(agent, "system_message", None)),
+            question,
+        ]
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _llm_cache_get_text(agent, question: str):
+    try:
+        key = _llm_cache_key(agent, question)
+        with _llm_cache_lock:
+            row = _llm_cache().execute(
+                "SELECT content, ts FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+    except Exception:
+        return None
+    if row is not None and time.time() - row[1] < _LLM_CACHE_TTL:
+        return row[0]
+    return None
+
+def _llm_cache_store(agent, question: str, content: str) -> None:
+    try:
+        key = _llm_cache_key(agent, question)
+        with _llm_cache_lock:
+            conn = _llm_cache()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, content, ts) VALUES (?, ?, ?)",
+                (key, content, int(time.time())),
+            )
+            conn.commit()
+    except Exception:
+        pass
+
+# Optional semantic cache behind the exact-match layer: paraphrased questions
+# ("what does this repo do?" vs "explain this repository") reuse a stored
+# answer when cosine similarity clears the threshold. Opt-in via
+# SEMANTIC_CACHE=1 since the local embedding model is an ~80 MB download.
+_SEMANTIC_THRESHOLD = 0.92
+_semantic_entries = []  # (unit-normalized embedding, content) pairs
+_semantic_lock = threading.Lock()
+_semantic_model = None
+
+def _get_semantic_model():
+    global _semantic_model
+    if _semantic_model is None and os.getenv("SEMANTIC_CACHE") == "1":
+        try:
+            from sentence_transformers import SentenceTransformer
+            _semantic_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        except Exception as e:
+            log.warning("Semantic cache disabled: %s", e)
+            _semantic_model = False
+    return _semantic_model or None
+
+def _semantic_lookup(question: str):
+    """Returns (embedding, cached content or None). Embeddings are unit
+    length, so the inner product is the cosine similarity directly."""
+    model = _get_semantic_model()
+    if model is None:
+        return None, None
+    emb = model.encode([question], normalize_embeddings=True)[0]
+    best, best_score = None, 0.0
+    with _semantic_lock:
+        for stored_emb, content in _semantic_entries:
+            score = float(stored_emb @ emb)
+            if score > best_score:
+                best, best_score = content, score
+    if best_score > _SEMANTIC_THRESHOLD:
+        return emb, best
+    return emb, None
+
+def _semantic_store(emb, content: str) -> None:
+    if emb is None:
+        return
+    with _semantic_lock:
+        _semantic_entries.append((emb, content))
+
+def cached_run(agent, question: str):
+    """Run agent.run(question), serving identical prompts from the SQLite
+    cache for 30 minutes and near-duplicates from the semantic cache when
+    enabled. Returns the response content string."""
+    content = _llm_cache_get_text(agent, question)
+    if content is not None:
+        return content
+    emb, near_hit = _semantic_lookup(question)
+    if near_hit is not None:
+        return near_hit
+    response = agent.run(message=question)
+    content = response.content if hasattr(response, "content") else None
+    if content:
+        _llm_cache_store(agent, question, content)
+        _semantic_store(emb, content)
+    return content
+
+
+# Cheap regex routing for trivially classifiable queries. A confident match
+# lets callers skip the Team's LLM routing call (a full Groq round trip spent
+# only on deciding "GitHub Agent or Reasoning Agent").
+_FAST_ROUTES = [
+    (re.compile(r"\b(list|show|get|fetch|read)\b.*\b(file|dir|directory|contents)\b", re.I), "github"),
+    (re.compile(r"\b(PR|pull request|issue)\s*#?\d*", re.I), "github"),
+    (re.compile(r"\b(explain|how|why|architecture|workflow)\b", re.I), "reasoning"),
+]
+
+def route_query(query: str):
+    """Classify a query as "github" or "reasoning" using cheap regexes.
+
+    Returns None when no pattern matches, or when patterns disagree; callers
+    should fall back to the Team's LLM router in that case.
+    """
+    targets = {target for pattern, target in _FAST_ROUTES if pattern.search(query)}
+    if len(targets) == 1:
+        return targets.pop()
+    return None
+
+def run_routed(query: str) -> str:
+    """Answer a query through the cheapest capable entry point.
+
+    A confident regex classification dispatches straight to the matching
+    cached agent (through cached_run, so repeats skip the model entirely);
+    only ambiguous queries pay the Team's LLM routing round trip.
+    """
+    target = route_query(query)
+    if target == "github":
+        return cached_run(get_github_agent(), query)
+    if target == "reasoning":
+        return cached_run(get_reasoning_agent(), query)
+    response = get_router_team().run(query)
+    return response.content if hasattr(response, "content") else response
+
+
+# Built once at import/first use; every caller shares the same Team so agent
+# and tool construction does not repeat per user turn.
+_team = None
+
+def get_router_team() -> Team:
+    """Create and configure the team with improved coordination between agents."""
+    global _team
+    if _team is not None:
+        return _team
+    from agno.team import Team
+    from agno.tools.function import Function
+
+    github_agent = get_github_agent()
+
+    def _mode_for_query(query: str) -> str:
+        q = query.lower()
+        if "pull request" in q or "issue" in q or re.search(r"\bprs?\b", q):
+            return "pr"
+        return "core"
+
+    async def _ainfo(agent: Agent, query: str) -> str:
+        response = await agent.arun(message=f"Internal request: {query}")
+        if hasattr(response, 'content'):
+            return response.content
+        return None
+
+    def _info_one(query: str) -> str:
+        key = query.strip().lower()
+        # An explicit "refresh" in the query bypasses and repopulates the cache.
+        if "refresh" not in key:
+            with _info_cache_lock:
+                hit = _info_cache.get(key)
+            if hit is not None and time.monotonic() - hit[0] < _INFO_CACHE_TTL:
+                return hit[1]
+        # Pick the lightest tool set that can answer this query; a smaller
+        # schema means fewer prompt tokens on the internal Groq call.
+        agent = get_github_agent(mode=_mode_for_query(query))
+        internal_query = f"Internal request: {query}"
+        # Persistent exact-match layer behind the in-memory one: internal
+        # queries repeat across sessions, and these calls dominate cost.
+        if "refresh" not in key:
+            content = _llm_cache_get_text(agent, internal_query)
+            if content is not None:
+                return content
+        # Serialize on the shared Agent: pool workers that drew the same mode
+        # (and so the same lru_cached instance) would otherwise interleave
+        # Agent.run's mutable run state.
+        with _agent_run_lock(agent):
+            try:
+                # Run the GitHub Agent on the background loop so its I/O
+                # overlaps any other tool calls the caller has in flight.
+                content = asyncio.run_coroutine_threadsafe(_ainfo(agent, query), _get_bg_loop()).result()
+            except Exception:
+                response = agent.run(message=internal_query)
+                content = response.content if hasattr(response, 'content') else None
+        if content:
+            _llm_cache_store(agent, internal_query, content)
+        if content is None:
+            return "Error retrieving information"
+        with _info_cache_lock:
+            if len(_info_cache) >= _INFO_CACHE_MAX:
+                _info_cache.pop(next(iter(_info_cache)))
+            _info_cache[key] = (time.monotonic(), content)
+        return content
+
+    def get_github_info(queries: list) -> str:
+        # Fan independent sub-queries out over the shared thread pool; each
+        # one still goes through _info_one so it shares the TTL and persistent
+        # caches with every other caller.
+        results = list(_info_pool.map(_info_one, queries))
+        return _dumps(dict(zip(queries, results)))
+
+    get_github_info_tool = Function(
+        name="get_github_info",
+        description=(
+            "Request one or more pieces of information from the GitHub Agent. "
+            "Independent queries run concurrently, so batch everything you "
+            "need in a single call."
+        ),
+        parameters={
+            "type": "object",
+            "properties": {
+                "queries": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "The queries to send to the GitHub Agent, e.g., ['get the contents of README.md', 'list the files in the src directory']"
+                }
+            },
+            "required": ["queries"]
+        },
+        # Function is a pydantic model; the callable field is entrypoint
+        # (an unknown kwarg would be silently dropped, leaving a tool the
+        # model can call but the framework can't execute).
+        entrypoint=get_github_info,
+    )
+
+    reasoning_agent = get_reasoning_agent()
+    if reasoning_agent.tools is None:
+        reasoning_agent.tools = []
+    reasoning_agent.tools.append(get_github_info_tool)
+
+    _team = Team(
+        name="GitHub-Reasoning Team",
+        mode="coordinate",
+        model=llm_groq,
+        members=[github_agent, reasoning_agent],
+        instructions=_TEAM_INSTRUCTIONS,
         enable_agentic_context=True,
         markdown=True,
         debug_mode=True,
         show_members_responses=False,
-        add_history_to_messages=True,
-    )
\ No newline at end of file
+        # Team's history replay is gated on enable_team_history;
+        # num_history_runs alone is inert. Together they replay the last six
+        # runs into the coordinator's context and no more.
+        enable_team_history=True,
+        num_history_runs=6,
+    )
+    return _team
\ No newline at end of file
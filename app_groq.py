@@ -1,48 +1,60 @@
-import os
-import nest_asyncio
+# Keep module-level imports to what first paint needs: streamlit, the CSS,
+# and the sidebar helpers. The agents module (and behind it the whole
+# agno + PyGithub stack, ~800 ms of import time) is pulled in lazily inside
+# main() after the page chrome is already on screen.
+import logging
+import time
+
 import streamlit as st
-from agents import get_github_agent
-from agno.agent import Agent
-from agno.utils.log import logger
-from dotenv import load_dotenv
 
-load_dotenv() 
 from utils import (
-    CUSTOM_CSS,
     about_widget,
     add_message,
     display_tool_calls,
+    get_cached_github_agent,
+    inject_custom_css,
     sidebar_widget,
 )
 
-nest_asyncio.apply()
+logger = logging.getLogger("git_ai_agent.app")
+
 st.set_page_config(
     page_title="GitHub Repo Analyzer (Groq)",
     page_icon="👨‍💻",
     layout="wide",
 )
 
-st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+inject_custom_css()
+
+# How many trailing messages are replayed as full chat bubbles on each rerun;
+# anything older collapses into a single expander element.
+_RENDER_WINDOW = 20
 
 def main() -> None:
     st.markdown("<h1 class='main-header'>👨‍💻 GitHub Repo Analyzer (Groq)</h1>", unsafe_allow_html=True)
     st.markdown("Analyze GitHub repositories using Groq LLMs")
 
-    if "github_agent" not in st.session_state or st.session_state["github_agent"] is None:
-        logger.info("---*--- Creating new Github agent (Groq) ---*---")
-        github_agent = get_github_agent()
-        st.session_state["github_agent"] = github_agent
+    # Deferred heavy imports; the first rerun pays them once, after the
+    # header above has painted. nest_asyncio.apply() is idempotent.
+    import nest_asyncio
+
+    nest_asyncio.apply()
+    from agents import GITHUB_ACCESS_TOKEN, compact_question
+
+    if "messages" not in st.session_state:
         st.session_state["messages"] = []
-        
-        # Get GitHub token from environment
-        github_token = os.getenv("GITHUB_ACCESS_TOKEN")
-        if not github_token:
-            st.error("GitHub token not found in environment! Please check your .env file.")
-            return
-            
-        st.session_state["github_token"] = github_token
-    else:
-        github_agent = st.session_state["github_agent"]
+
+    # agents.py already parsed .env once at import and raised if the token
+    # was missing; no per-rerun os.getenv / dotenv re-parse needed here.
+    if "github_token" not in st.session_state:
+        st.session_state["github_token"] = GITHUB_ACCESS_TOKEN
+
+    # The agent factory is lru_cached in agents.py and wrapped in
+    # st.cache_resource in utils, so every rerun (and the router team)
+    # shares one Agent and its PyGithub connection pool; restart_agent()
+    # clears both caches. The session token is part of the cache key, so a
+    # sidebar token change yields an agent built with the new credentials.
+    github_agent = get_cached_github_agent(st.session_state["github_token"])
 
     try:
         st.session_state["github_agent_session_id"] = github_agent.load_session()
@@ -53,45 +65,109 @@ def main() -> None:
     if github_agent.memory is not None and not st.session_state.get("messages"):
         session_id = st.session_state.get("github_agent_session_id")
         agent_runs = github_agent.memory.get_runs(session_id)
-        if agent_runs:
-            st.session_state["messages"] = []
-            for run_response in agent_runs:
-                for msg in run_response.messages or []:
-                    if msg.role in ["user", "assistant"] and msg.content is not None:
-                        add_message(msg.role, msg.content, getattr(msg, "tool_calls", None))
-        else:
-            st.session_state["messages"] = []
+        # Rebuild in one bulk assignment (no per-message add_message calls)
+        # and memoize on (session, run count): when the history is empty the
+        # falsy-messages guard above never trips, so without the signature
+        # this block would re-walk the runs on every keystroke-rerun.
+        runs_sig = (session_id, len(agent_runs or []))
+        if st.session_state.get("_last_runs_sig") != runs_sig:
+            st.session_state["messages"] = [
+                {
+                    "role": msg.role,
+                    "content": msg.content,
+                    "tool_calls": getattr(msg, "tool_calls", None),
+                }
+                for run_response in agent_runs or []
+                for msg in run_response.messages or []
+                if msg.role in ("user", "assistant")
+                and msg.content
+                and str(msg.content).strip()
+            ]
+            st.session_state["_last_runs_sig"] = runs_sig
 
     sidebar_widget()
 
     if prompt := st.chat_input("👋 Ask me about GitHub repositories!"):
         add_message("user", prompt)
 
-    for message in st.session_state["messages"]:
+    # Streamlit clears every element on rerun, so past messages cannot be
+    # rendered just once — but the per-rerun cost can be kept flat. Only the
+    # most recent window is replayed as individual chat bubbles (each one is
+    # a container + markdown parse + tool-call expanders); older turns fold
+    # into a single collapsed expander rendered as one markdown blob.
+    messages = st.session_state["messages"]
+    if len(messages) > _RENDER_WINDOW:
+        older, recent = messages[:-_RENDER_WINDOW], messages[-_RENDER_WINDOW:]
+        with st.expander(f"Earlier conversation ({len(older)} messages)", expanded=False):
+            st.markdown(
+                "\n\n---\n\n".join(
+                    f"**{m['role']}:** {m['content']}"
+                    for m in older
+                    if m["role"] in ["user", "assistant"] and m.get("content")
+                )
+            )
+    else:
+        recent = messages
+    for msg_idx, message in enumerate(recent):
         if message["role"] in ["user", "assistant"]:
             _content = message["content"]
             if _content is not None:
                 with st.chat_message(message["role"]):
                     if "tool_calls" in message and message["tool_calls"]:
-                        display_tool_calls(st.empty(), message["tool_calls"])
+                        display_tool_calls(
+                            st.empty(), message["tool_calls"], scope=f"history_{msg_idx}"
+                        )
                     st.markdown(_content)
 
     last_message = st.session_state["messages"][-1] if st.session_state["messages"] else None
     if last_message and last_message.get("role") == "user":
-        question = last_message["content"]
+        # The agent no longer replays full history; fold older turns into a
+        # rolling summary and keep only the recent ones verbatim.
+        question = compact_question(
+            last_message["content"], st.session_state["messages"][:-1]
+        )
         with st.chat_message("assistant"):
             tool_calls_container = st.empty()
-            resp_container = st.empty()
             with st.spinner("🤔 Thinking (Groq)..."):
-                response = ""
-                try:
-                    run_response = github_agent.run(question, stream=True, stream_intermediate_steps=True)
-                    for _resp_chunk in run_response:
+                # st.write_stream buffers and diffs the streamed markdown
+                # internally, replacing the old accumulate-and-repaint loop
+                # (which re-parsed the whole answer on every update). The
+                # tool-call panel keeps its own 50 ms throttle since it sits
+                # outside the stream.
+                last_tools_render = 0.0
+
+                def token_gen():
+                    nonlocal last_tools_render
+                    for _resp_chunk in github_agent.run(
+                        question, stream=True, stream_intermediate_steps=True
+                    ):
                         if _resp_chunk.tools and len(_resp_chunk.tools) > 0:
-                            display_tool_calls(tool_calls_container, _resp_chunk.tools)
-                        if _resp_chunk.event == "RunResponse" and _resp_chunk.content is not None:
-                            response += _resp_chunk.content
-                            resp_container.markdown(response)
+                            now = time.monotonic()
+                            if now - last_tools_render > 0.05:
+                                display_tool_calls(tool_calls_container, _resp_chunk.tools)
+                                last_tools_render = now
+                        if _resp_chunk.event == "RunResponse" and _resp_chunk.content:
+                            yield _resp_chunk.content
+
+                try:
+                    response = st.write_stream(token_gen)
+                    if isinstance(response, list):
+                        response = "".join(str(part) for part in response)
+                    # Final render carries a scope; the throttled in-stream
+                    # renders above stay scope-less so this pass is the only
+                    # one emitting the opt-in buttons for this container.
+                    if github_agent.run_response.tools:
+                        display_tool_calls(
+                            tool_calls_container,
+                            github_agent.run_response.tools,
+                            scope="final",
+                        )
+
+                    # Surface token metrics so prefix-cache hits (stable
+                    # system prompt, compacted history) are visible in logs.
+                    run_metrics = getattr(github_agent.run_response, "metrics", None)
+                    if run_metrics:
+                        logger.info(f"Run metrics: {run_metrics}")
 
                     add_message("assistant", response, github_agent.run_response.tools)
                 except Exception as e:
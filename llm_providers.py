@@ -1,6 +1,6 @@
+import functools
 import os
 from dotenv import load_dotenv
-from agno.models.groq import Groq
 
 load_dotenv()
 
@@ -8,14 +8,37 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found in .env file.")
 
-llm_groq = Groq(
-    id="meta-llama/llama-4-maverick-17b-128e-instruct",
-    api_key=GROQ_API_KEY,
-    temperature=0.5
-)
-
-llm_qwen_reasoning = Groq(
-    id="qwen-qwq-32b",
-    api_key=GROQ_API_KEY,
-    temperature=0.3
-)
+
+@functools.lru_cache(maxsize=None)
+def get_groq(id: str, temperature: float = 0.5):
+    """Return one shared Groq client per (id, temperature).
+
+    Caching here means helpers that build their own model handles still end
+    up on the same client object — and the same underlying httpx connection
+    pool — instead of paying a fresh TLS handshake before the first token.
+    The agno import lives inside the factory so merely importing this module
+    stays cheap.
+    """
+    from agno.models.groq import Groq
+
+    return Groq(id=id, api_key=GROQ_API_KEY, temperature=temperature)
+
+
+# Named handles for existing call sites, resolved lazily via module
+# __getattr__ (PEP 562): `from llm_providers import llm_groq` only constructs
+# the client — and pulls in the agno/groq stack — at that point, not when a
+# script merely imports this module. llm_groq_small is the cheap, fast model
+# for tool-call-and-relay work and history summarization; analysis stays on
+# the larger two.
+_MODEL_SPECS = {
+    "llm_groq": ("meta-llama/llama-4-maverick-17b-128e-instruct", 0.5),
+    "llm_qwen_reasoning": ("qwen-qwq-32b", 0.3),
+    "llm_groq_small": ("llama-3.1-8b-instant", 0.2),
+}
+
+
+def __getattr__(name: str):
+    spec = _MODEL_SPECS.get(name)
+    if spec is not None:
+        return get_groq(*spec)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,21 +1,72 @@
+import functools
 import json
 from typing import Any, Dict, List, Optional
 
+# Prefer orjson for decoding tool-call payloads (multi-KB repo listings) when
+# it is installed; its JSONDecodeError subclasses ValueError, so the except
+# clauses below cover both decoders. Same guarded-optional pattern as
+# agents.py.
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 import streamlit as st
 from agno.utils.log import log_debug, log_error, log_info
 
 
+def inject_custom_css() -> None:
+    """Emit the app's <style> block for the current script run.
+
+    This must run on every rerun: Streamlit drops all elements emitted by
+    the previous run, so a st.cache_resource sentinel that emitted the CSS
+    only on first call would leave later reruns unstyled. The string itself
+    is a module constant, so the per-rerun cost is one small markdown
+    element; the frontend's delta-diffing already avoids re-applying an
+    unchanged style node.
+    """
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_github_agent(token: Optional[str] = None):
+    """Process-wide GitHub agent handle under Streamlit's resource cache.
+
+    Delegates to the lru_cached factory in agents.py (which stays
+    Streamlit-free), forwarding the sidebar token so the agent is built
+    with the credentials the user actually entered. Wrapping it in
+    st.cache_resource gives the UI an explicit invalidation handle
+    (restart_agent calls .clear()) and keeps the heavy agents import out
+    of first paint.
+    """
+    from agents import get_github_agent
+
+    return get_github_agent(token=token)
+
+
 def add_message(
     role: str, content: str, tool_calls: Optional[List[Dict[str, Any]]] = None
 ) -> None:
     """Safely add a message to the session state"""
-    if "messages" not in st.session_state or not isinstance(
-        st.session_state["messages"], list
-    ):
-        st.session_state["messages"] = []
-    st.session_state["messages"].append(
-        {"role": role, "content": content, "tool_calls": tool_calls}
-    )
+    msgs = st.session_state.setdefault("messages", [])
+    if not isinstance(msgs, list):
+        msgs = st.session_state["messages"] = []
+    msgs.append({"role": role, "content": content, "tool_calls": tool_calls})
+
+
+# (label, query) pairs for the sample-query buttons, built once at import
+# instead of six inline blocks per rerun. Stable key= values let Streamlit
+# skip rediffing identical widget subtrees.
+SAMPLE_QUERIES = (
+    ("📋 Summarize 'agno-agi/agno'", "Summarize 'agno-agi/agno' repo"),
+    ("📊 Analyze 'pytorch/pytorch' repository structure", "Analyze 'pytorch/pytorch' repository structure"),
+    ("🔍 Search for 'machine learning' related code in 'tensorflow/tensorflow'", "Search for 'machine learning' related code in 'tensorflow/tensorflow'"),
+    ("📝 Summarize recent PRs in 'facebook/react'", "Summarize recent PRs in 'facebook/react'"),
+    ("🛠️ List CI/CD workflows in 'kubernetes/kubernetes'", "List CI/CD workflows in 'kubernetes/kubernetes'"),
+    ("📈 Analyze commit history of 'torvalds/linux'", "Analyze commit history of 'torvalds/linux'"),
+)
 
 
 def sidebar_widget() -> None:
@@ -25,11 +76,29 @@ def sidebar_widget() -> None:
         st.header("Configuration")
 
         st.markdown("**GitHub Token**")
-        token_input = st.text_input(
+
+        def _on_token_change() -> None:
+            # Runs only when the input actually changes — no per-rerun diff —
+            # and Streamlit reruns the script right after, so no manual
+            # st.rerun(). Both cache layers must be dropped: clearing only
+            # the st.cache_resource wrapper would leave the inner lru_cache
+            # handing back the agent built with the old token.
+            token = st.session_state.get("github_token_input") or None
+            st.session_state.github_token = token
+            log_info(
+                f"GitHub token updated via sidebar input {'(cleared)' if not token else ''}."
+            )
+            from agents import get_github_agent
+
+            get_github_agent.cache_clear()
+            get_cached_github_agent.clear()
+
+        st.text_input(
             "Enter your GitHub Personal Access Token (required for most queries):",
             type="password",
             key="github_token_input",
             value=st.session_state.get("github_token", ""),
+            on_change=_on_token_change,
             help="Allows the agent to access GitHub API, including your private/org data.",
         )
         st.markdown(
@@ -37,34 +106,16 @@ def sidebar_widget() -> None:
             unsafe_allow_html=True,
         )
 
-        # Update session state if token input changes
-        current_token_in_state = st.session_state.get("github_token")
-        if token_input != current_token_in_state and (
-            token_input or current_token_in_state is not None
-        ):
-            st.session_state.github_token = token_input if token_input else None
-            log_info(
-                f"GitHub token updated via sidebar input {'(cleared)' if not token_input else ''}."
-            )
-            st.session_state.github_agent = None
-            st.rerun()
-
         st.markdown("---")
 
         st.markdown("#### 🏆 Sample Queries")
-        if st.button("📋 Summarize 'agno-agi/agno'"):
-            # Run this query in the current session
-            add_message("user", "Summarize 'agno-agi/agno' repo")
-        if st.button("📊 Analyze 'pytorch/pytorch' repository structure"):
-            add_message("user", "Analyze 'pytorch/pytorch' repository structure")
-        if st.button("🔍 Search for 'machine learning' related code in 'tensorflow/tensorflow'"):
-            add_message("user", "Search for 'machine learning' related code in 'tensorflow/tensorflow'")
-        if st.button("📝 Summarize recent PRs in 'facebook/react'"):
-            add_message("user", "Summarize recent PRs in 'facebook/react'")
-        if st.button("🛠️ List CI/CD workflows in 'kubernetes/kubernetes'"):
-            add_message("user", "List CI/CD workflows in 'kubernetes/kubernetes'")
-        if st.button("📈 Analyze commit history of 'torvalds/linux'"):
-            add_message("user", "Analyze commit history of 'torvalds/linux'")
+        for i, (label, query) in enumerate(SAMPLE_QUERIES):
+            # At most one button reads True per rerun, so stop checking the
+            # rest once it is found.
+            if st.button(label, key=f"sample_query_{i}"):
+                # Run this query in the current session
+                add_message("user", query)
+                break
         # Chat controls
         st.header("Chat")
         if st.button("🆕 New Chat"):
@@ -88,37 +139,120 @@ def about_widget() -> None:
         )
 
 
+# Characters a JSON document can start with; anything else (typical markdown
+# tool output) is rejected before invoking the parser, whose failure path
+# allocates an exception + traceback per call.
+_JSON_STARTS = frozenset('{["tfn-0123456789')
+
+
 def is_json(myjson):
     """Check if a string is valid JSON"""
+    if not isinstance(myjson, str):
+        return False
+    return _is_json_str(myjson)
+
+
+@functools.lru_cache(maxsize=256)
+def _is_json_str(s: str) -> bool:
+    # Cached: Streamlit reruns re-validate the same tool-call content strings.
+    if s.lstrip()[:1] not in _JSON_STARTS:
+        return False
     try:
-        json.loads(myjson)
-    except (ValueError, TypeError):
+        _loads(s)
+    except ValueError:
         return False
     return True
 
 
-def display_tool_calls(tool_calls_container, tools):
-    """Display tool calls in a streamlit container with expandable sections."""
+def _try_parse(content):
+    """Parse a string as JSON exactly once; returns the object or None."""
+    if not isinstance(content, str) or content.lstrip()[:1] not in _JSON_STARTS:
+        return None
+    try:
+        return _loads(content)
+    except ValueError:
+        return None
+
+
+# Payloads above this size (repo trees on big repos can reach MBs) get a
+# bounded preview instead of shipping the whole tree to the browser DOM.
+_MAX_RENDER_BYTES = 65536
+
+
+@functools.lru_cache(maxsize=256)
+def _pretty(name: str) -> str:
+    """Expander label for a tool name; cached since the same few names are
+    re-rendered on every rerun."""
+    return name.replace("_", " ").title()
+
+
+def _render_large_json(parsed, content, widget_scope=None):
+    """Render a bounded preview of an oversized JSON payload.
+
+    Shows the first entries (list) or top-level keys (dict) and, when the
+    caller provides a widget_scope, a button to opt into the full payload;
+    the opt-in is remembered in session state so it survives reruns. A None
+    scope (streaming repaints) renders the preview without the button.
+    """
+    flag = f"full_payload_{hash(content)}"
+    if st.session_state.get(flag):
+        st.json(parsed, expanded=False)
+        return
+    if isinstance(parsed, list):
+        st.json(parsed[:100], expanded=False)
+        st.caption(
+            f"Preview: first 100 of {len(parsed):,} entries "
+            f"({len(content):,} bytes total)."
+        )
+    elif isinstance(parsed, dict):
+        st.json({k: parsed[k] for k in list(parsed)[:20]}, expanded=False)
+        st.caption(
+            f"Preview: {min(len(parsed), 20)} of {len(parsed):,} top-level "
+            f"keys ({len(content):,} bytes total)."
+        )
+    else:
+        st.code(content[:_MAX_RENDER_BYTES], language="json")
+        st.caption(f"Preview truncated ({len(content):,} bytes total).")
+    # The key must be unique across everything rendered in one run, so the
+    # caller supplies the scope (message index / final pass). Streaming
+    # repaints pass None and skip the button: the final render after the
+    # stream would otherwise reuse the same container and collide.
+    if widget_scope is not None and st.button(
+        "Show full payload", key=f"{flag}_{widget_scope}"
+    ):
+        st.session_state[flag] = True
+        st.rerun()
+
+
+def display_tool_calls(tool_calls_container, tools, scope=None):
+    """Display tool calls in a streamlit container with expandable sections.
+
+    scope names this render for widget keys; it must differ between call
+    sites active in the same run. None (the streaming default) renders
+    previews without interactive widgets.
+    """
     try:
         with tool_calls_container.container():
-            for tool_call in tools:
-                tool_name = tool_call.get("tool_name", "Unknown Tool")
-                tool_args = tool_call.get("tool_args", {})
-                content = tool_call.get("content", None)
-                metrics = tool_call.get("metrics", None)
-
-                # Add timing information
-                execution_time_str = "N/A"
+            for _idx, tool_call in enumerate(tools):
+                # One bound .get per iteration instead of four method lookups.
+                get = tool_call.get
+                tool_name = get("tool_name", "Unknown Tool")
+                tool_args = get("tool_args", {})
+                content = get("content")
+                metrics = get("metrics")
+
+                # Add timing information; getattr with a default replaces the
+                # hasattr-then-access pair.
                 try:
-                    if metrics is not None and hasattr(metrics, "time"):
-                        execution_time = metrics.time
-                        if execution_time is not None:
-                            execution_time_str = f"{execution_time:.4f}s"
+                    execution_time = getattr(metrics, "time", None)
+                    execution_time_str = (
+                        "N/A" if execution_time is None else f"{execution_time:.4f}s"
+                    )
                 except Exception:
-                    pass
+                    execution_time_str = "N/A"
 
                 with st.expander(
-                    f"🛠️ {tool_name.replace('_', ' ').title()} ({execution_time_str})",
+                    f"🛠️ {_pretty(tool_name)} ({execution_time_str})",
                     expanded=False,
                 ):
                     # Show arguments in a readable format
@@ -128,11 +262,26 @@ def display_tool_calls(tool_calls_container, tools):
 
                     if content is not None:
                         try:
-                            if is_json(content):
-                                st.markdown("**Results:**")
-                                st.json(content)
+                            # Parse once and hand st.json the object; passing
+                            # the string would make Streamlit parse it again.
+                            parsed = _try_parse(content)
+                            st.markdown("**Results:**")
+                            oversized = len(content) > _MAX_RENDER_BYTES
+                            if parsed is not None:
+                                if oversized:
+                                    _render_large_json(
+                                        parsed,
+                                        content,
+                                        None if scope is None else f"{scope}_{_idx}",
+                                    )
+                                else:
+                                    st.json(parsed)
+                            elif oversized:
+                                st.markdown(content[:_MAX_RENDER_BYTES])
+                                st.caption(
+                                    f"Truncated ({len(content):,} chars total)."
+                                )
                             else:
-                                st.markdown("**Results:**")
                                 st.markdown(content)
                         except Exception:
                             st.markdown(content)
@@ -142,10 +291,20 @@ def display_tool_calls(tool_calls_container, tools):
 def restart_agent():
     """Reset the agent and clear chat history"""
     log_debug("---*--- Restarting agent ---*---")
-    st.session_state["sql_agent"] = None
-    st.session_state["sql_agent_session_id"] = None
+    # Clear the shared agent's accumulated history, then drop both cache
+    # layers (inner lru_cache and st.cache_resource) so the next access
+    # builds a fresh agent instead of resurrecting the old instance.
+    try:
+        from agents import get_github_agent, reset_history
+
+        reset_history(get_github_agent())
+        get_github_agent.cache_clear()
+    except Exception:
+        pass
+    get_cached_github_agent.clear()
     st.session_state["messages"] = []
-    st.session_state["github_agent"] = None
+    st.session_state.pop("github_agent_session_id", None)
+    st.session_state.pop("_last_runs_sig", None)
     st.rerun()
 
 